@@ -1,8 +1,32 @@
 import os
+import sys
+import json
 import time
+import shutil
+import subprocess
 import requests
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from gtts import gTTS
-from moviepy.editor import ImageClip, concatenate_videoclips
+from PIL import Image
+from moviepy.editor import VideoClip, AudioClip, AudioFileClip, CompositeAudioClip, concatenate_videoclips
+from moviepy.config import get_setting
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+DEFAULT_MANIFEST = "manifests/stealth_noir.json"
+WORKSPACE_DIR = "workspace"
+DEFAULT_STYLE = ", flat 2D vector art, minimalist corporate noir style, high contrast, dark charcoal background"
+
+# Pollinations starts flagging bursts above a handful of parallel pulls; renders are CPU bound.
+FETCH_WORKERS = 6
+RENDER_WORKERS = max(1, (os.cpu_count() or 2) // 2)
+NARRATION_TAIL = 0.5
+FETCH_RETRIES = 2
+FETCH_BACKOFF = 1
 
 def generate_free_voice(text, output_path):
     """Generates speech completely free using Google's TTS engine without any API keys."""
@@ -16,23 +40,22 @@ def generate_free_voice(text, output_path):
         print(f"❌ Voice Engine Failed: {e}")
         return False
 
-def generate_stealth_image(prompt, output_path):
+def generate_stealth_image(prompt, output_path, style_lock=DEFAULT_STYLE):
     """Pulls standard images using the default endpoint to glide completely under the firewall radar."""
     print(f"[IMAGE-FACTORY] Fetching stealth asset...")
-    
+
     # Simple, high-impact style lock
-    style_lock = ", flat 2D vector art, minimalist corporate noir style, high contrast, dark charcoal background"
     full_prompt = prompt + style_lock
-    
+
     # 🌟 THE TRICK: No widths, no heights, no parameters. This looks like standard safe traffic.
     url = f"https://image.pollinations.ai/p/{requests.utils.quote(full_prompt)}"
-    
+
     headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"}
-    
+
     try:
         response = requests.get(url, headers=headers, timeout=30)
         content_type = response.headers.get("Content-Type", "").lower()
-        
+
         if response.status_code == 200 and "image" in content_type:
             with open(output_path, "wb") as f:
                 f.write(response.content)
@@ -45,73 +68,197 @@ def generate_stealth_image(prompt, output_path):
         print(f"❌ Network Timeout: {e}")
         return False
 
-def build_production_short():
-    print("=== STARTING STEALTH RESIZING VIDEOPRODUCTION ===")
-    os.makedirs("workspace", exist_ok=True)
-    os.makedirs("videos", exist_ok=True)
-    
-    video_chapters = {
-        "intro": {
-            "text": "When you walk into a bank with zero dollars... you aren't a customer. You are a liability.",
-            "prompt": "An empty cold dark bank lobby, dramatic sharp lighting, minimalist corporate noir"
-        },
-        "scenes": [
-            {
-                "text": "At the ten-thousand dollar barrier, the system charges you money... just to hold your money.",
-                "prompt": "A stoic man in a sharp suit looking down at a screen, high contrast shadow"
-            },
-            {
-                "text": "But cross the seven-figure mark? The rules completely bend. The fees vanish.",
-                "prompt": "The same stoic man sitting in a luxury boardroom chair, minimalist lighting"
-            }
-        ]
-    }
-    
-    clips = []
-    
-    # 1. Generate Intro Media Assets
-    intro_img = "workspace/stealth_intro.jpg"
-    intro_audio = "workspace/stealth_intro.mp3"
-    
-    if not generate_stealth_image(video_chapters["intro"]["prompt"], intro_img) or not generate_free_voice(video_chapters["intro"]["text"], intro_audio):
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+def load_manifest(path):
+    """Reads a JSON or YAML production manifest and fills in per-scene defaults."""
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith((".yaml", ".yml")):
+            if yaml is None:
+                raise RuntimeError("YAML manifests need PyYAML installed (pip install pyyaml)")
+            manifest = yaml.safe_load(f)
+        else:
+            manifest = json.load(f)
+
+    manifest.setdefault("output", "videos/final_video.mp4")
+    manifest.setdefault("style", DEFAULT_STYLE)
+    manifest.setdefault("fps", 24)
+    manifest["resolution"] = tuple(manifest.get("resolution", (1920, 1080)))
+
+    # libx264's default yuv420p needs even dimensions
+    if len(manifest["resolution"]) != 2 or not all(_is_number(v) and v > 0 and v == int(v) and int(v) % 2 == 0 for v in manifest["resolution"]):
+        raise ValueError(f"Manifest {path} resolution must be two positive even integers, got {manifest['resolution']}")
+    manifest["resolution"] = tuple(int(v) for v in manifest["resolution"])
+    if not _is_number(manifest["fps"]) or manifest["fps"] <= 0:
+        raise ValueError(f"Manifest {path} fps must be a positive number, got {manifest['fps']!r}")
+
+    if not manifest.get("chapters"):
+        raise ValueError(f"Manifest {path} has no chapters")
+
+    for c_index, chapter in enumerate(manifest["chapters"]):
+        if not chapter.get("scenes"):
+            raise ValueError(f"Chapter {c_index} ({chapter.get('title', 'untitled')}) has no scenes")
+        for s_index, scene in enumerate(chapter["scenes"]):
+            if not scene.get("prompt"):
+                raise ValueError(f"Chapter {c_index} scene {s_index} has no image prompt")
+            scene.setdefault("text", "")
+            scene.setdefault("duration", 5)
+            if not _is_number(scene["duration"]) or scene["duration"] <= 0:
+                raise ValueError(f"Chapter {c_index} scene {s_index} duration must be a positive number, got {scene['duration']!r}")
+            # Alternate push-in / pull-out like the old hand-cut timeline did
+            scene.setdefault("zoom", [1.0, 1.2] if s_index % 2 else [1.1, 1.0])
+            scene["image_path"] = os.path.join(WORKSPACE_DIR, f"ch{c_index:03d}_sc{s_index:03d}.jpg")
+            scene["audio_path"] = os.path.join(WORKSPACE_DIR, f"ch{c_index:03d}_sc{s_index:03d}.mp3") if scene["text"] else None
+    return manifest
+
+def _fetch_with_retries(fetch, *args):
+    """Retries a failed fetch with exponential backoff so one 429 or timeout doesn't sink the run."""
+    for attempt in range(FETCH_RETRIES + 1):
+        if fetch(*args):
+            return True
+        if attempt < FETCH_RETRIES:
+            delay = FETCH_BACKOFF * (2 ** attempt)
+            print(f"   ↳ Retrying in {delay}s ({attempt + 1}/{FETCH_RETRIES})...")
+            time.sleep(delay)
+    return False
+
+def fetch_all_assets(manifest):
+    """Fires every image and narration request at once instead of walking the timeline serially."""
+    jobs = []
+    with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as ex:
+        for chapter in manifest["chapters"]:
+            for scene in chapter["scenes"]:
+                jobs.append((scene["image_path"], ex.submit(_fetch_with_retries, generate_stealth_image, scene["prompt"], scene["image_path"], manifest["style"])))
+                if scene["audio_path"]:
+                    jobs.append((scene["audio_path"], ex.submit(_fetch_with_retries, generate_free_voice, scene["text"], scene["audio_path"])))
+
+    failed = [path for path, job in jobs if not job.result()]
+    for path in failed:
+        print(f"❌ Asset Missing: {path}")
+    return not failed
+
+def _ken_burns_clip(img_path, duration, zoom, size):
+    """Zooms by cropping a pre-scaled still, so each frame is one crop + one output-sized resample."""
+    w, h = size
+    z_start, z_end = max(1.0, zoom[0]), max(1.0, zoom[1])
+    z_max = max(z_start, z_end)
+
+    # One LANCZOS upscale up front instead of a full-frame resize on every frame
+    with Image.open(img_path) as im:
+        base = im.convert("RGB").resize((round(w * z_max), round(h * z_max)), Image.LANCZOS)
+    bw, bh = base.size
+
+    def make_frame(t):
+        z = z_start + (z_end - z_start) * (t / duration)
+        cw, ch = bw / z, bh / z
+        left, top = (bw - cw) / 2, (bh - ch) / 2
+        box = (round(left), round(top), round(left + cw), round(top + ch))
+        frame = base.crop(box)
+        if frame.size != (w, h):
+            frame = frame.resize((w, h), Image.BILINEAR)
+        return np.asarray(frame)
+
+    return VideoClip(make_frame, duration=duration)
+
+def _silence(duration):
+    # Every chapter needs an audio stream or the stream-copy join drops sound after it
+    return AudioClip(lambda t: np.zeros((len(t), 2)) if np.ndim(t) else np.zeros(2), duration=duration, fps=44100)
+
+def render_chapter(index, chapter, size, fps):
+    """Renders one chapter to its own MP4. Runs inside a worker process."""
+    print(f"[RENDER] Chapter {index}: {chapter.get('title', 'untitled')} ({len(chapter['scenes'])} scenes)")
+    clips, narrations, timeline = [], [], None
+    out_path = os.path.join(WORKSPACE_DIR, f"chapter_{index:03d}.mp4")
+    # Workers are reused across chapters, so every ffmpeg reader opened here must be closed
+    try:
+        for scene in chapter["scenes"]:
+            duration = scene["duration"]
+            narration = None
+            if scene["audio_path"]:
+                narration = AudioFileClip(scene["audio_path"])
+                narrations.append(narration)
+                duration = max(duration, narration.duration + NARRATION_TAIL)
+
+            # Pad narration with silence to the full scene length, otherwise the chapter's audio ends
+            # NARRATION_TAIL early and the stream-copy join leaves a gap at every chapter boundary
+            audio = _silence(duration)
+            if narration:
+                audio = CompositeAudioClip([narration, audio]).set_duration(duration)
+
+            clip = _ken_burns_clip(scene["image_path"], duration, scene["zoom"], size)
+            clips.append(clip.set_audio(audio))
+
+        timeline = concatenate_videoclips(clips, method="chain")
+        timeline.write_videofile(
+            out_path,
+            fps=fps,
+            codec="libx264",
+            audio_codec="aac",
+            preset="ultrafast",
+            threads=2,
+            logger=None
+        )
+    finally:
+        for clip in ([timeline] if timeline else []) + clips + narrations:
+            clip.close()
+    print(f"✅ Chapter {index} Rendered: {out_path}")
+    return out_path
+
+def join_chapters(chapter_paths, output_path):
+    """Stitches the chapter files with ffmpeg's concat demuxer (no re-encode)."""
+    if len(chapter_paths) == 1:
+        shutil.copyfile(chapter_paths[0], output_path)
+        return True
+
+    list_path = os.path.join(WORKSPACE_DIR, "chapters.txt")
+    with open(list_path, "w", encoding="utf-8") as f:
+        for path in chapter_paths:
+            f.write(f"file '{os.path.abspath(path)}'\n")
+
+    cmd = [get_setting("FFMPEG_BINARY"), "-y", "-loglevel", "error", "-f", "concat", "-safe", "0",
+           "-i", list_path, "-c", "copy", "-movflags", "+faststart", output_path]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        print(f"❌ Chapter Join Failed: {result.stderr.strip()[:200]}")
+        return False
+    return True
+
+def build_long_form(manifest_path=DEFAULT_MANIFEST):
+    print("=== STARTING MANIFEST-DRIVEN LONG-FORM PRODUCTION ===")
+    os.makedirs(WORKSPACE_DIR, exist_ok=True)
+
+    manifest = load_manifest(manifest_path)
+    output_path = manifest["output"]
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    chapters = manifest["chapters"]
+    print(f"[STUDIO] {manifest.get('title', manifest_path)}: {len(chapters)} chapters, "
+          f"{sum(len(c['scenes']) for c in chapters)} scenes")
+
+    # 1. Pull every image and narration track concurrently
+    if not fetch_all_assets(manifest):
         print("\n❌ STOPPING PRODUCTION: Core assets could not be compiled.")
         return False
-    
-    # 🌟 INTERNAL UPSCALING: We explicitly command MoviePy to force the image to 1920x1080 screen size
-    intro_clip = ImageClip(intro_img).set_duration(10).resize(newsize=(1920, 1080))
-    intro_clip = intro_clip.resize(lambda t: 1.0 + (0.03 * t))
-    clips.append(intro_clip)
-    
-    # 2. Generate Chapter Scene Cuts
-    for index, scene in enumerate(video_chapters["scenes"]):
-        img_path = f"workspace/stealth_scene_{index}.jpg"
-        
-        if not generate_stealth_image(scene["prompt"], img_path):
-            print(f"❌ STOPPING PRODUCTION: Failed to generate scene slide {index}.")
+
+    # 2. Render chapters side by side, each in its own process
+    print(f"[STUDIO] Rendering chapters across {RENDER_WORKERS} workers...")
+    with ProcessPoolExecutor(max_workers=min(RENDER_WORKERS, len(chapters))) as ex:
+        futures = [ex.submit(render_chapter, i, chapter, manifest["resolution"], manifest["fps"])
+                   for i, chapter in enumerate(chapters)]
+        try:
+            chapter_paths = [f.result() for f in futures]
+        except Exception as e:
+            print(f"❌ STOPPING PRODUCTION: Chapter render crashed: {e}")
             return False
-        
-        # Force 1920x1080 sizing inside the runner context memory
-        slide_clip = ImageClip(img_path).set_duration(5).resize(newsize=(1920, 1080))
-        if index % 2 == 0:
-            slide_clip = slide_clip.resize(lambda t: 1.06 - (0.02 * t))
-        else:
-            slide_clip = slide_clip.resize(lambda t: 1.0 + (0.04 * t))
-            
-        clips.append(slide_clip)
-        
+
     # 3. Compile Master Timeline
-    print("[STUDIO] Compiling video timeline matrix...")
-    final_movie = concatenate_videoclips(clips, method="compose")
-    
-    print("[RENDER] Exporting master full-HD MP4...")
-    final_movie.write_videofile(
-        "videos/final_premium_short.mp4",
-        fps=24,
-        codec="libx264",
-        preset="ultrafast"
-    )
-    print("🎉 PRODUCTION COMPLETE: videos/final_premium_short.mp4 is ready!")
+    print("[STUDIO] Joining chapter renders into master timeline...")
+    if not join_chapters(chapter_paths, output_path):
+        return False
+
+    print(f"🎉 PRODUCTION COMPLETE: {output_path} is ready!")
     return True
 
 if __name__ == "__main__":
-    build_production_short()
+    if not build_long_form(sys.argv[1] if len(sys.argv) > 1 else DEFAULT_MANIFEST):
+        sys.exit(1)
@@ -0,0 +1,54 @@
+import io
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFilter
+
+from upload_script import AssetCandidatePool, Config
+
+
+def cartoon(bg=(65, 105, 225), face=(255, 204, 0), shift=0):
+    """Flat brand-palette toy face, roughly what the Pollinations prompt asks for."""
+    im = Image.new("RGB", (1080, 1920), bg)
+    d = ImageDraw.Draw(im)
+    d.ellipse((240 + shift, 560, 840 + shift, 1160), fill=face, outline=(0, 0, 0), width=12)
+    d.ellipse((400 + shift, 760, 480 + shift, 840), fill=(0, 0, 0))
+    d.ellipse((600 + shift, 760, 680 + shift, 840), fill=(0, 0, 0))
+    d.arc((380 + shift, 850, 700 + shift, 1050), 20, 160, fill=(0, 0, 0), width=14)
+    return im
+
+
+def hamming(a, b):
+    return np.count_nonzero(AssetCandidatePool.phash(a) != AssetCandidatePool.phash(b))
+
+
+def test_flat_frame_scores_zero():
+    for color in Config.BRAND_COLORS:
+        assert AssetCandidatePool.quality(Image.new("RGB", Config.SHORT_SIZE, color)) == 0.0
+
+
+def test_blurred_frame_scores_lower_than_sharp():
+    sharp = cartoon()
+    blurred = sharp.filter(ImageFilter.GaussianBlur(10))
+    assert AssetCandidatePool.quality(blurred) < AssetCandidatePool.quality(sharp)
+    assert AssetCandidatePool.quality(blurred) < AssetCandidatePool.QUALITY_FLOOR
+
+
+def test_clean_frames_clear_floor_on_any_brand_background():
+    # Mango Yellow backgrounds are bright; exposure must not push them under the floor
+    for bg, face in [((65, 105, 225), (255, 204, 0)), ((255, 204, 0), (0, 139, 139)), ((0, 139, 139), (255, 204, 0))]:
+        assert AssetCandidatePool.quality(cartoon(bg, face)) > AssetCandidatePool.QUALITY_FLOOR
+
+
+def test_near_duplicate_within_distance():
+    base = cartoon()
+    buf = io.BytesIO()
+    base.save(buf, "JPEG", quality=60)
+    recompressed = Image.open(buf).convert("RGB")
+    assert hamming(base, recompressed) <= AssetCandidatePool.DUPLICATE_DISTANCE
+    assert hamming(base, cartoon(shift=12)) <= AssetCandidatePool.DUPLICATE_DISTANCE
+
+
+def test_different_frames_outside_distance():
+    rng = np.random.default_rng(0)
+    other = Image.fromarray((rng.random((40, 30, 3)) * 255).astype("uint8")).resize(Config.SHORT_SIZE, Image.BICUBIC)
+    assert hamming(cartoon(), other) > AssetCandidatePool.DUPLICATE_DISTANCE
@@ -1,4 +1,4 @@
-import os, random, json, requests, time, numpy as np, re, math, subprocess, shutil, sys, io
+import os, random, json, requests, time, numpy as np, re, math, subprocess, shutil, sys, io, threading
 import urllib.parse
 from pathlib import Path
 import pickle
@@ -30,6 +30,7 @@ class Config:
     ENG_FONT_FILE = os.path.join(ASSETS_DIR, "EngFont.ttf")
     BRAND_COLORS = [(255, 204, 0), (65, 105, 225), (0, 139, 139)] # Mango Yellow, Royal Blue, Deep Turquoise
     CHANNEL_HANDLE = "@HindiMastiRhymes"
+    SHORT_SIZE = (1080, 1920)
 
     @staticmethod
     def initialize():
@@ -287,7 +288,7 @@ class AssetEngine:
 
     @staticmethod
     def generate_image(prompt, filepath, fallback_kw, seed):
-        w, h = 1080, 1920
+        w, h = Config.SHORT_SIZE
         scene_seed = seed + random.randint(1, 100)
         clean_prompt = urllib.parse.quote(f"{prompt}, Mango Yellow, Royal Blue, Deep Turquoise, 3D Pixar Cocomelon style, cute face looking at camera")
         
@@ -299,8 +300,7 @@ class AssetEngine:
         elif AssetEngine._execute_download(url_public, filepath, None, 45, "Image Fallback"):
             pass 
         else:
-            Image.new('RGB', (w, h), random.choice(Config.BRAND_COLORS)).save(filepath)
-            return
+            return False
 
         try:
             with Image.open(filepath) as im:
@@ -309,6 +309,11 @@ class AssetEngine:
                 im = ImageEnhance.Contrast(im).enhance(1.10)
                 im.save(filepath, "JPEG", quality=98, optimize=True)
         except Exception: pass
+        return True
+
+    @staticmethod
+    def brand_slide(filepath):
+        Image.new('RGB', Config.SHORT_SIZE, random.choice(Config.BRAND_COLORS)).save(filepath, "JPEG")
 
     @staticmethod
     def generate_voice(text, filepath):
@@ -340,6 +345,197 @@ class AssetEngine:
             shutil.copyfile(os.path.join(Config.ASSETS_DIR, "bg_music_default.mp3"), out_path)
             return False
 
+class AssetCandidatePool:
+    """Fetches one asset per scene, then spends a bounded budget on extra variants where they matter."""
+    IMAGE_VARIANTS = 3          # hard cap of image fetches per scene
+    CLIP_VARIANTS = 1           # clips are slow to generate, so no speculative extras by default
+    EXTRA_FETCH_BUDGET = 12     # speculative fetches (beyond the first per scene) across the whole short
+    TIME_BUDGET = 240           # seconds into the speculative pass after which no new fetch is started
+    QUALITY_FLOOR = 0.45        # below this a scene always gets another variant (blurred frames land ~0.4)
+    RELATIVE_BAR = 0.85         # ...as does one scoring under 85% of this short's median scene
+    DUPLICATE_DISTANCE = 10     # pHash hamming distance (out of 64) treated as the same frame
+    CLIP_BONUS = 0.15           # motion beats a still of similar quality, but not a much better one
+    _DCT = None
+
+    def __init__(self, master_seed, fallback_kw):
+        self.master_seed = master_seed
+        self.fallback_kw = fallback_kw
+        self.extra_budget = self.EXTRA_FETCH_BUDGET
+        self.deadline = None
+        self.lock = threading.Lock()
+        self.candidates = {}    # scene index -> list of {"kind", "path", "quality", "hash"}
+        self.best = {}          # scene index -> current leading candidate
+        self.prompts = {}
+        self.variants_left = {} # scene index -> [(kind, k), ...] not fetched yet
+        self.picked_hashes = []
+
+    # ---------- cheap NumPy scoring ----------
+    @staticmethod
+    def _dct_matrix(n=32):
+        if AssetCandidatePool._DCT is None:
+            k = np.arange(n)[:, None]
+            m = np.cos(np.pi * (2 * np.arange(n)[None, :] + 1) * k / (2 * n)) * np.sqrt(2.0 / n)
+            m[0] /= np.sqrt(2)
+            AssetCandidatePool._DCT = m
+        return AssetCandidatePool._DCT
+
+    @staticmethod
+    def phash(im):
+        gray = np.asarray(im.convert("L").resize((32, 32), Image.LANCZOS), dtype=np.float64)
+        d = AssetCandidatePool._dct_matrix()
+        low = (d @ gray @ d.T)[:8, :8].flatten()
+        return low > np.median(low[1:])
+
+    @staticmethod
+    def quality(im):
+        """0..1 blend of sharpness (Laplacian variance), exposure and contrast. 0 means unusable."""
+        small = im.convert("L")
+        small.thumbnail((256, 256))
+        g = np.asarray(small, dtype=np.float32)
+        contrast = g.std() / 255.0
+        if contrast < 0.04: return 0.0    # flat fill / blank frame
+        lap = 4 * g[1:-1, 1:-1] - g[:-2, 1:-1] - g[2:, 1:-1] - g[1:-1, :-2] - g[1:-1, 2:]
+        sharpness = 1.0 - math.exp(-lap.var() / 300.0)
+        # Flat across normal exposures (Mango Yellow frames sit near 0.75); only crushed or blown frames lose
+        mean = g.mean() / 255.0
+        exposure = min(1.0, max(0.0, min((mean - 0.05) / 0.15, (0.95 - mean) / 0.15)))
+        return 0.5 * sharpness + 0.3 * exposure + 0.2 * min(1.0, contrast / 0.25)
+
+    @staticmethod
+    def _load_frame(kind, path):
+        if kind == "image":
+            with Image.open(path) as im:
+                return im.convert("RGB")
+        clip = VideoFileClip(path)
+        try:
+            return Image.fromarray(clip.get_frame(clip.duration / 2))
+        finally:
+            clip.close()
+
+    def _score(self, kind, path):
+        try:
+            im = self._load_frame(kind, path)
+            return {"kind": kind, "path": path, "quality": self.quality(im), "hash": self.phash(im)}
+        except Exception:
+            print(f"   ↳ ⚠️ Candidate {os.path.basename(path)} unreadable. Discarding.")
+            return None
+
+    def _is_duplicate(self, scene_index, h):
+        # Only earlier scenes' current leaders count: select() runs in scene order, so the later
+        # scene of a colliding pair is the one that has to change
+        with self.lock:
+            others = [c["hash"] for i, c in self.best.items() if i < scene_index]
+        return any(np.count_nonzero(h != o) <= self.DUPLICATE_DISTANCE for o in others)
+
+    def _take_budget(self):
+        with self.lock:
+            if self.extra_budget <= 0 or time.time() > self.deadline: return False
+            self.extra_budget -= 1
+            return True
+
+    def _rank(self, cand):
+        return cand["quality"] + (self.CLIP_BONUS if cand["kind"] == "video" else 0.0)
+
+    def _keep(self, scene_index, cand):
+        with self.lock:
+            self.candidates.setdefault(scene_index, []).append(cand)
+            leader = self.best.get(scene_index)
+            if leader is None or self._rank(cand) > self._rank(leader):
+                self.best[scene_index] = cand
+
+    def _try_candidate(self, i, kind, path):
+        """Scores a fetched file and keeps it if usable. Returns True if it was kept."""
+        cand = self._score(kind, path)
+        if cand and cand["quality"] > 0:
+            self._keep(i, cand)
+            return True
+        if os.path.exists(path): os.unlink(path)
+        return False
+
+    def _fetch_variant(self, i, kind, k):
+        prompt = self.prompts[i]
+        if kind == "video":
+            path = os.path.join(Config.ASSETS_DIR, f"vid_{i}_c{k}.mp4")
+            return AssetEngine.generate_pollinations_video(prompt, path) and self._try_candidate(i, kind, path)
+        path = os.path.join(Config.ASSETS_DIR, f"img_{i}_v{k}.jpg")
+        # Seed windows are 100 wide so the random jitter never lands two variants on the same seed
+        seed = self.master_seed + (i * self.IMAGE_VARIANTS + k) * 100
+        return AssetEngine.generate_image(prompt, path, self.fallback_kw, seed) and self._try_candidate(i, kind, path)
+
+    # ---------- pass 1: one free asset per scene ----------
+    def prefetch(self, i, prompt):
+        """Runs inside the scene worker threads. Fetches the scene's first clip, or one image if that fails."""
+        self.prompts[i] = prompt
+        queue = [("video", k) for k in range(1, self.CLIP_VARIANTS)]
+        if not self._fetch_variant(i, "video", 0):
+            print(f"   ↳ Scene {i}: Video fallback to Image candidates")
+            self._fetch_variant(i, "image", 0)
+            queue += [("image", k) for k in range(1, self.IMAGE_VARIANTS)]
+        else:
+            queue += [("image", k) for k in range(self.IMAGE_VARIANTS)]
+        self.variants_left[i] = queue
+
+    # ---------- pass 2: budgeted speculative variants ----------
+    def _needy_scenes(self):
+        """Scenes worth another variant, most urgent first: missing, duplicate, then weakest."""
+        scores = [c["quality"] for c in self.best.values()]
+        # Relative to this short's own median so bright palettes or a hard prompt don't drain the budget
+        bar = max(self.QUALITY_FLOOR, self.RELATIVE_BAR * float(np.median(scores))) if scores else self.QUALITY_FLOOR
+        needy = []
+        for i, queue in self.variants_left.items():
+            if not queue: continue
+            cands = self.candidates.get(i, [])
+            clean = [c["quality"] for c in cands if not self._is_duplicate(i, c["hash"])]
+            if not cands: needy.append((0, 0.0, i))
+            elif not clean: needy.append((1, max(c["quality"] for c in cands), i))
+            elif max(clean) < bar: needy.append((2, max(clean), i))
+        return [i for _, _, i in sorted(needy)]
+
+    def refine(self):
+        """Spends EXTRA_FETCH_BUDGET one variant per needy scene per round, re-ranking between rounds."""
+        self.deadline = time.time() + self.TIME_BUDGET
+        with ThreadPoolExecutor(max_workers=5) as ex:
+            while True:
+                batch = []
+                for i in self._needy_scenes():
+                    if not self._take_budget(): break
+                    batch.append(ex.submit(self._fetch_variant, i, *self.variants_left[i].pop(0)))
+                if not batch: break
+                for f in batch: f.result()
+        print(f"   ↳ Candidate pool: {self.EXTRA_FETCH_BUDGET - self.extra_budget} speculative fetch(es) used")
+
+    # ---------- selection ----------
+    def select(self, i, vid_path, img_path):
+        """Moves the winning candidate to the scene's canonical path. Must be called in scene order."""
+        cands = self.candidates.get(i, [])
+
+        def adjusted(c):
+            if not self.picked_hashes: return self._rank(c)
+            nearest = min(np.count_nonzero(c["hash"] != h) for h in self.picked_hashes)
+            penalty = max(0.0, 1.0 - nearest / (self.DUPLICATE_DISTANCE * 2))
+            return self._rank(c) - 0.6 * penalty
+
+        ranked = sorted(cands, key=adjusted, reverse=True)
+        best = ranked[0] if ranked else None
+        # Best image stays on img_path as the render loop's fallback if MoviePy rejects the clip
+        backup = next((c for c in ranked if c["kind"] == "image"), None)
+
+        if best and best["kind"] == "video": os.replace(best["path"], vid_path)
+        elif os.path.exists(vid_path): os.unlink(vid_path)
+        if backup: os.replace(backup["path"], img_path)
+        else: AssetEngine.brand_slide(img_path)  # instant, so a rejected clip never triggers a refetch
+
+        for c in ranked:
+            if c is best or c is backup: continue
+            try: os.unlink(c["path"])
+            except Exception: pass
+
+        if best:
+            self.picked_hashes.append(best["hash"])
+            print(f"   ↳ Scene {i}: picked {best['kind']} (quality {best['quality']:.2f}) from {len(cands)} candidate(s)")
+        else:
+            print(f"   ↳ Scene {i}: no usable candidates, using brand slide")
+
 # ==========================================
 # CORE 4: VIDEO STUDIO (SPEED ENCODING OPTIMIZED)
 # ==========================================
@@ -388,25 +584,29 @@ class VideoStudio:
         master_seed = random.randint(1000, 999999)
         kw = script_data.get('keyword', 'kids')
         total_scenes = len(script_data['scenes'])
+        pool = AssetCandidatePool(master_seed, kw)
 
         def build_scene_assets(i, scene):
-            img_path = os.path.join(Config.ASSETS_DIR, f"img_{i}.jpg")
-            vid_path = os.path.join(Config.ASSETS_DIR, f"vid_{i}.mp4")
             aud_path = os.path.join(Config.ASSETS_DIR, f"aud_{i}.mp3")
             
             if not AssetEngine.generate_pollinations_audio(scene['line'], aud_path):
                 print(f"   ↳ Scene {i}: Audio fallback to TTS")
                 AssetEngine.generate_voice(scene['line'], aud_path)
                 
-            if not AssetEngine.generate_pollinations_video(scene.get('image_prompt', 'cartoon'), vid_path):
-                print(f"   ↳ Scene {i}: Video fallback to Image")
-                AssetEngine.generate_image(scene.get('image_prompt', 'cartoon'), img_path, kw, master_seed)
+            pool.prefetch(i, scene.get('image_prompt', 'cartoon'))
 
         # PERFORMANCE UPDATE: Increased parallelism to 5 threads for faster downloads
         with ThreadPoolExecutor(max_workers=5) as ex:
             futures = [ex.submit(build_scene_assets, i, scene) for i, scene in enumerate(script_data['scenes'])]
             for f in as_completed(futures): f.result()
 
+        # Variants only start once every scene has its first asset, and go to duplicates and weak scenes first
+        pool.refine()
+
+        # Picks run in scene order so each one is penalised for resembling the scenes before it
+        for i in range(total_scenes):
+            pool.select(i, os.path.join(Config.ASSETS_DIR, f"vid_{i}.mp4"), os.path.join(Config.ASSETS_DIR, f"img_{i}.jpg"))
+
         clips = []
         timestamps = []
         current_time = 0.0
@@ -452,9 +652,6 @@ class VideoStudio:
                     anim = None
             
             if anim is None:
-                if not os.path.exists(img_path):
-                    AssetEngine.generate_image(scene.get('image_prompt', 'cartoon'), img_path, kw, master_seed)
-                    
                 img = ImageClip(img_path).resize(1.15)
                 ex_x, ex_y = img.w - w, img.h - h
                 move = random.choice(['zoom_in','zoom_out','pan_left','pan_right','pan_up','pan_down'])